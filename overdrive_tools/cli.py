@@ -4,10 +4,12 @@
 
 import os
 import sys
+import logging
 import argparse
 from typing import List
 from rich.console import Console
 from rich.table import Table
+from rich.logging import RichHandler
 
 from .core.downloader import OverDriveDownloader
 from .core.processor import AudioProcessor
@@ -34,8 +36,8 @@ def handle_download(args: argparse.Namespace) -> None:
             
         try:
             console.print(f"\n[cyan]Processing: {odm_file}[/cyan]")
-            downloader = OverDriveDownloader(odm_file)
-            output_dir = downloader.download()
+            with OverDriveDownloader(odm_file) as downloader:
+                output_dir = downloader.download()
             
             if args.process:
                 console.print("\n[cyan]Processing chapters...[/cyan]")
@@ -59,8 +61,8 @@ def handle_return(args: argparse.Namespace) -> None:
             
         try:
             console.print(f"\n[cyan]Returning: {odm_file}[/cyan]")
-            downloader = OverDriveDownloader(odm_file)
-            downloader.early_return()
+            with OverDriveDownloader(odm_file) as downloader:
+                downloader.early_return()
             console.print(f"[green]Successfully returned: {odm_file}[/green]")
             
         except Exception as e:
@@ -174,6 +176,16 @@ def main(args: List[str] = None) -> None:
     parser = create_parser()
     args = parser.parse_args(args)
 
+    # Debug output from the core modules is only rendered with --verbose; the root
+    # logger is left alone so httpx/h2 never log request headers (license, client ID)
+    logger = logging.getLogger("overdrive_tools")
+    logger.setLevel(logging.DEBUG if args.verbose else logging.WARNING)
+    if not logger.handlers:
+        handler = RichHandler(console=console, show_path=False)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+    logger.propagate = False
+
     try:
         # Only set output format if it's a download command and format is specified
         if args.command == 'download' and hasattr(args, 'output_format') and args.output_format:
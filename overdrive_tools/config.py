@@ -1,11 +1,16 @@
 # overdrive_tools/config.py
 
+import os
+
 class Config:
     VERSION = "3.0.0"
     OMC = "1.2.0"
     OS = "10.11.6"
     USER_AGENT = "OverDrive Media Console"
     DIR_FORMAT = "@AUTHOR - @TITLE"
+    DOWNLOAD_WORKERS = 6
+    HTTP_TIMEOUT = 30.0
+    SPLIT_WORKERS = min(8, os.cpu_count() or 1)
     
     # Colors for console output
     COLORS = {
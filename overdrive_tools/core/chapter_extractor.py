@@ -1,13 +1,52 @@
 import os
 import re
-from typing import Dict, List, Tuple
-import mutagen.id3 as id3
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
 from mutagen.mp3 import MP3
-from collections import OrderedDict
 from rich.console import Console
 from . import utils
 
 console = Console()
+logger = logging.getLogger(__name__)
+
+# ID3 frames are keyed by "FRAME:desc", so the marker frame is a single dict lookup
+_MARKERS_KEY = "TXXX:OverDrive MediaMarkers"
+
+_MARKER_RE = re.compile(
+    r"<Name>\s*(?P<name>[^>]+?)\s*</Name><Time>\s*(?P<time>[\d:.]+)\s*</Time>",
+    re.MULTILINE
+)
+
+# Suffix patterns that need a regex; the fixed-character cleanups are done with str methods
+_SUFFIX_PATTERNS = [
+    re.compile(r"\s*\([^)]*\)$"),  # Remove sub-chapter markers
+    re.compile(r"\s*-?\s*Chapter\s+\d+\s+Continued\)?$", re.IGNORECASE),  # Remove "Chapter X Continued"
+    re.compile(r"\s+\(?continued\)?$"),  # Keep existing continued check
+]
+_DISK_RE = re.compile(r"^Dis[kc]\s+\d+\W*$")
+
+def _clean_name(name: str) -> str:
+    """Strip OverDrive decorations such as quotes and continuation markers from a chapter name."""
+    # Unwrap "..." and then *...*
+    for mark in ('"', '*'):
+        if len(name) > 2 and name[0] == mark == name[-1]:
+            name = name[1:-1]
+    for pattern in _SUFFIX_PATTERNS:
+        name = pattern.sub("", name)
+    # Drop a trailing " -" left behind by the suffixes above
+    head = name.rstrip()
+    if head.endswith('-') and head[:-1] != head[:-1].rstrip():
+        name = head[:-1].rstrip()
+    if _DISK_RE.match(name):
+        return ""
+    return name.strip()
+
+def _parse_ts(s: str) -> float:
+    """Convert an [[HH:]MM:]SS.mmm marker time to seconds."""
+    parts = tuple(s.rsplit(':', 2))
+    h, m, sec = ('0', '0', '0')[:3 - len(parts)] + parts
+    return int(h) * 3600 + int(m) * 60 + float(sec)
 
 class ChapterExtractor:
     def __init__(self, directory: str):
@@ -18,115 +57,114 @@ class ChapterExtractor:
         """Convert seconds to HH:MM:SS.mmm format."""
         return utils.format_timestamp(secs)
         
-    def _load_mp3(self, total: float, file: str) -> Tuple[float, List[List[str]]]:
-        """Load and extract chapter information from MP3 file."""
+    def _parse_mp3(self, entry: os.DirEntry) -> Tuple[float, List[List[str]], List[str]]:
+        """Load an MP3 file and return its duration, raw chapters relative to its start and status messages."""
+        # Runs on a pool thread, so status lines are returned and printed in file order by the caller
+        file = entry.name
+        messages = []
         try:
-            path = os.path.join(self.directory, file)
-            audio = MP3(path)
-            m = id3.ID3(path)
-            data = m.get("TXXX:OverDrive MediaMarkers")
+            if entry.stat().st_size < 128:
+                messages.append(f"[yellow]Skipping {file}: file is too small to be an MP3[/yellow]")
+                return 0.0, [], messages
+
+            # MP3 already parses the ID3 header, so reuse its tags rather than reopening the file
+            audio = MP3(entry.path)
+            m = audio.tags
+            data = m.get(_MARKERS_KEY) if m is not None else None
             
             if not data:
-                console.print(f"[yellow]Can't find TXXX data point for {file}[/yellow]")
-                return total + audio.info.length, []
+                messages.append(f"[yellow]Can't find TXXX data point for {file}[/yellow]")
+                return audio.info.length, [], messages
                 
             info = data.text[0]
-            console.print(f"[blue]Processing chapters from {file}[/blue]")
-            console.print(f"[dim]Raw chapter data: {info[:200]}...[/dim]")  # Debug output
-            
-            file_chapters = re.findall(
-                r"<Name>\s*([^>]+?)\s*</Name><Time>\s*([\d:.]+)\s*</Time>",
-                info,
-                re.MULTILINE
-            )
-            
-            if not file_chapters:
-                console.print(f"[yellow]No chapters found in {file} using regular expression[/yellow]")
-                return total + audio.info.length, []
+            messages.append(f"[blue]Processing chapters from {file}[/blue]")
+            logger.debug("Raw chapter data: %.200s...", info)
             
             chapters = []
-            for i, chapter in enumerate(file_chapters):
+            matched = False
+            for i, marker in enumerate(_MARKER_RE.finditer(info)):
+                matched = True
                 try:
-                    if len(chapter) != 2:
-                        console.print(f"[yellow]Invalid chapter format in {file}, chapter {i+1}: {chapter}[/yellow]")
-                        continue
-                        
-                    name, length = chapter
-                    console.print(f"[dim]Processing chapter: {name} at {length}[/dim]")  # Debug output
-                    
-                    # Clean up chapter name
-                    name = re.sub(r'^"(.+)"$', r"\1", name)
-                    name = re.sub(r"^\*(.+)\*$", r"\1", name)
-                    name = re.sub(r"\s*\([^)]*\)$", "", name)  # Remove sub-chapter markers
-                    name = re.sub(r"\s*-?\s*Chapter\s+\d+\s+(?i)Continued\)?$", "", name)  # Remove "Chapter X Continued"
-                    name = re.sub(r"\s+\(?continued\)?$", "", name)  # Keep existing continued check
-                    name = re.sub(r"\s+-\s*$", "", name)
-                    name = re.sub(r"^Dis[kc]\s+\d+\W*$", "", name)
-                    name = name.strip()
-                    
-                    if not name:
-                        console.print(f"[yellow]Empty chapter name after cleaning in {file}, chapter {i+1}[/yellow]")
-                        continue
+                    name, length = marker.group('name', 'time')
+                    logger.debug("Processing chapter: %s at %s", name, length)
                     
                     # Convert timestamp to seconds with error handling
-                    t_parts = list(length.split(":"))
-                    if not t_parts:
-                        console.print(f"[red]Invalid timestamp format in {file}, chapter {i+1}: {length}[/red]")
-                        continue
-                    
-                    t_parts.reverse()
                     try:
-                        seconds = total + float(t_parts[0])  # seconds
-                        if len(t_parts) > 1:
-                            seconds += int(t_parts[1]) * 60  # minutes
-                        if len(t_parts) > 2:
-                            seconds += int(t_parts[2]) * 60 * 60  # hours
+                        seconds = _parse_ts(length)
                         chapters.append([name, seconds])
-                        console.print(f"[dim]Successfully processed chapter: {name} at {self._timestr(seconds)}[/dim]")
-                    except (ValueError, IndexError) as e:
-                        console.print(f"[red]Error parsing timestamp {length} in {file}, chapter {i+1}: {str(e)}[/red]")
+                        logger.debug("Successfully processed chapter: %s at %.3fs (relative to file)", name, seconds)
+                    except ValueError as e:
+                        messages.append(f"[red]Error parsing timestamp {length} in {file}, chapter {i+1}: {str(e)}[/red]")
                         continue
                         
                 except Exception as e:
-                    console.print(f"[red]Error processing chapter in {file}, chapter {i+1}: {str(e)}[/red]")
+                    messages.append(f"[red]Error processing chapter in {file}, chapter {i+1}: {str(e)}[/red]")
                     continue
+
+            if not matched:
+                messages.append(f"[yellow]No chapters found in {file} using regular expression[/yellow]")
+                return audio.info.length, [], messages
             
             if not chapters:
-                console.print(f"[yellow]No valid chapters extracted from {file}[/yellow]")
-            else:
-                console.print(f"[green]Successfully extracted {len(chapters)} chapters from {file}[/green]")
+                messages.append(f"[yellow]No valid chapters extracted from {file}[/yellow]")
             
-            return total + audio.info.length, chapters
+            return audio.info.length, chapters, messages
             
         except Exception as e:
-            console.print(f"[red]Error processing file {file}: {str(e)}[/red]")
-            return total, []
+            messages.append(f"[red]Error processing file {file}: {str(e)}[/red]")
+            return 0.0, [], messages
     
     def extract_chapters(self) -> bool:
         """Extract chapters from all MP3 files in directory."""
         try:
             total = 0
-            all_chapters = OrderedDict()
+            all_chapters = {}
             
             # Get all MP3 files and sort them
-            mp3_files = [f for f in os.listdir(self.directory) if f.endswith('.mp3')]
+            with os.scandir(self.directory) as it:
+                mp3_files = sorted(
+                    (e for e in it if e.name.endswith('.mp3') and e.is_file()),
+                    key=lambda e: e.name
+                )
             if not mp3_files:
                 console.print("[red]No MP3 files found in directory[/red]")
                 return False
             
             console.print(f"[blue]Found {len(mp3_files)} MP3 files[/blue]")
             
-            # Process each MP3 file
-            for file in sorted(mp3_files):
+            # Parse the MP3 files concurrently; results come back in sorted order
+            with ThreadPoolExecutor(max_workers=min(32, len(mp3_files))) as executor:
+                results = list(executor.map(self._parse_mp3, mp3_files))
+
+            # Offset each file's chapters by the running duration of the files before it
+            seen = set()
+            for entry, (duration, chapters, messages) in zip(mp3_files, results):
+                file = entry.name
+                for message in messages:
+                    console.print(message)
                 try:
-                    total, chapters = self._load_mp3(total, file)
-                    for chapter in chapters:
-                        if not chapter[0]:  # Skip empty chapter names
+                    added = 0
+                    for raw_name, seconds in chapters:
+                        # Markers are often repeated across parts; skip the cleanup for ones already seen
+                        if raw_name in seen:
+                            console.print(f"[yellow]Duplicate chapter name found: {raw_name}[/yellow]")
+                            continue
+                        seen.add(raw_name)
+
+                        name = _clean_name(raw_name)
+                        if not name:  # Skip empty chapter names
+                            console.print(f"[yellow]Empty chapter name after cleaning in {file}: {raw_name}[/yellow]")
                             continue
-                        if chapter[0] in all_chapters:
-                            console.print(f"[yellow]Duplicate chapter name found: {chapter[0]}[/yellow]")
+                        if name in all_chapters:
+                            console.print(f"[yellow]Duplicate chapter name found: {name}[/yellow]")
                             continue
-                        all_chapters[chapter[0]] = chapter[1]
+                        all_chapters[name] = total + seconds
+                        added += 1
+                    if added:
+                        console.print(f"[green]Successfully extracted {added} chapters from {file}[/green]")
+                    elif chapters:
+                        console.print(f"[yellow]No valid chapters extracted from {file}[/yellow]")
+                    total += duration
                 except Exception as e:
                     console.print(f"[red]Error processing {file}: {str(e)}[/red]")
                     continue
@@ -138,10 +176,9 @@ class ChapterExtractor:
             # Write chapters to file
             chapters_file = os.path.join(self.directory, "chapters.txt")
             try:
+                lines = [f"{self._timestr(length)} {name}\n" for name, length in all_chapters.items()]
                 with open(chapters_file, "w", encoding='utf-8') as f:
-                    for name, length in all_chapters.items():
-                        chapter_line = f"{self._timestr(length)} {name}"
-                        f.write(chapter_line + "\n")
+                    f.write(''.join(lines))
                 
                 console.print(f"[green]Successfully extracted {len(all_chapters)} chapters to {chapters_file}[/green]")
                 return True
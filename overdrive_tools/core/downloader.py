@@ -1,12 +1,29 @@
 # overdrive_tools/core/downloader.py
 
 import os
-import requests
-import xml.etree.ElementTree as ET
+import mmap
+import httpx
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
+from itertools import accumulate
 from typing import Optional
 from urllib.parse import quote
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
 from rich.console import Console
+try:
+    from lxml import etree as ET
+
+    def _xml_parser():
+        """Return a new lxml parser that never resolves entities or fetches from the network."""
+        # Downloaded files are untrusted and older lxml resolves external entities by default;
+        # parsers aren't shared since the cover download parses metadata on a pool thread
+        return ET.XMLParser(resolve_entities=False, no_network=True)
+except ImportError:  # lxml is optional; the stdlib parser handles the same API
+    import xml.etree.ElementTree as ET
+
+    def _xml_parser():
+        """Use the stdlib default parser, which doesn't load external entities."""
+        return None
 from ..config import Config
 from . import utils
 
@@ -18,6 +35,49 @@ class OverDriveDownloader:
         self.odm_path = odm_path
         self.metadata_path = f"{odm_path}.metadata"
         self.license_path = f"{odm_path}.license"
+
+        # Shared HTTP/2 client so every request multiplexes over the same connections
+        self._client = httpx.Client(
+            http2=True,
+            headers={"User-Agent": Config.USER_AGENT},
+            limits=httpx.Limits(max_connections=Config.DOWNLOAD_WORKERS),
+            timeout=Config.HTTP_TIMEOUT,
+            follow_redirects=True
+        )
+
+    def close(self) -> None:
+        """Close the shared HTTP client and its connections."""
+        self._client.close()
+
+    def __enter__(self) -> "OverDriveDownloader":
+        """Use the downloader as a context manager that closes its client."""
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Close the client on leaving the context."""
+        self.close()
+
+    @cached_property
+    def _odm_root(self) -> ET.Element:
+        """Parsed root element of the ODM file."""
+        return ET.parse(self.odm_path, _xml_parser()).getroot()
+
+    @cached_property
+    def _license_content(self) -> str:
+        """Contents of the license file."""
+        with open(self.license_path) as f:
+            return f.read().strip()
+
+    @cached_property
+    def _license_root(self) -> ET.Element:
+        """Parsed root element of the license file."""
+        # Parse from bytes: lxml rejects str input that carries an encoding declaration
+        return ET.fromstring(self._license_content.encode('utf-8'), _xml_parser())
+
+    @cached_property
+    def _metadata_root(self) -> ET.Element:
+        """Parsed root element of the extracted metadata file."""
+        return ET.parse(self.metadata_path, _xml_parser()).getroot()
         
     def extract_metadata(self) -> None:
         """Extract metadata from ODM file."""
@@ -25,27 +85,27 @@ class OverDriveDownloader:
             return
 
         try:
-            with open(self.odm_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            # Scan the mapped bytes so only the metadata section is ever copied
+            with open(self.odm_path, 'rb') as f, \
+                    mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                metadata_text = b"Metadata>"
+                metadata_start = mm.find(b"<" + metadata_text)
+                metadata_end = mm.find(b"</" + metadata_text)
+                if metadata_end != -1:
+                    metadata_end += len(b"</" + metadata_text)
 
-            metadata_text = "Metadata>"
-            metadata_start = content.find("<" + metadata_text)
-            metadata_end = content.find("</" + metadata_text) + len("</" + metadata_text)
-            
-            if metadata_start == -1 or metadata_end == -1:
-                cdata_start = content.find("<![CDATA[<" + metadata_text)
-                if cdata_start != -1:
-                    metadata_start = cdata_start + 9
-                    cdata_end = content.find("]]>", metadata_start)
-                    if cdata_end != -1:
-                        metadata_end = cdata_end
-            
-            if metadata_start == -1 or metadata_end == -1:
-                raise ValueError("Could not find Metadata section in ODM file")
-                
-            metadata = content[metadata_start:metadata_end]
-            
-            with open(self.metadata_path, 'w', encoding='utf-8') as f:
+                if metadata_start == -1 or metadata_end == -1:
+                    cdata_start = mm.find(b"<![CDATA[<" + metadata_text)
+                    if cdata_start != -1:
+                        metadata_start = cdata_start + 9
+                        metadata_end = mm.find(b"]]>", metadata_start)
+
+                if metadata_start == -1 or metadata_end == -1:
+                    raise ValueError("Could not find Metadata section in ODM file")
+
+                metadata = mm[metadata_start:metadata_end]
+
+            with open(self.metadata_path, 'wb') as f:
                 f.write(metadata)
                 
         except Exception as e:
@@ -58,8 +118,7 @@ class OverDriveDownloader:
 
         client_id, hash_value = utils.generate_client_id()
         
-        tree = ET.parse(self.odm_path)
-        root = tree.getroot()
+        root = self._odm_root
         
         acquisition_url = root.find(".//AcquisitionUrl").text
         media_id = root.get("id")
@@ -72,9 +131,7 @@ class OverDriveDownloader:
             "Hash": hash_value
         }
         
-        headers = {"User-Agent": Config.USER_AGENT}
-        
-        response = requests.get(acquisition_url, params=params, headers=headers)
+        response = self._client.get(acquisition_url, params=params)
         response.raise_for_status()
         
         with open(self.license_path, 'w') as f:
@@ -83,19 +140,29 @@ class OverDriveDownloader:
     def _download_part(self, url: str, headers: dict, output_path: str, 
                       progress: Optional[Progress] = None, task_id: Optional[str] = None) -> None:
         """Download a single part of the audiobook."""
-        response = requests.get(url, headers=headers, stream=True)
-        response.raise_for_status()
+        with self._client.stream("GET", url, headers=headers) as response:
+            response.raise_for_status()
+
+            total_size = int(response.headers.get('content-length', 0))
+            block_size = 256 * 1024
+            update_interval = 1024 * 1024
+            show_progress = progress and task_id is not None and total_size
+            downloaded = 0
+            last_update = 0
 
-        total_size = int(response.headers.get('content-length', 0))
-        block_size = 1024
-        downloaded = 0
+            with open(output_path, 'wb') as f:
+                for data in response.iter_bytes(block_size):
+                    f.write(data)
+                    if not show_progress:
+                        continue
+                    downloaded += len(data)
+                    # Throttle redraws to roughly once per megabyte
+                    if downloaded - last_update >= update_interval:
+                        progress.update(task_id, completed=(downloaded / total_size) * 100)
+                        last_update = downloaded
 
-        with open(output_path, 'wb') as f:
-            for data in response.iter_content(block_size):
-                f.write(data)
-                downloaded += len(data)
-                if progress and task_id and total_size:
-                    progress.update(task_id, completed=(downloaded / total_size) * 100)
+            if show_progress:
+                progress.update(task_id, completed=(downloaded / total_size) * 100)
 
     def download(self) -> str:
         """Download all parts of the audiobook and return the output directory."""
@@ -108,15 +175,17 @@ class OverDriveDownloader:
         output_dir = Config.DIR_FORMAT.replace("@AUTHOR", author).replace("@TITLE", title)
         utils.ensure_dir_exists(output_dir)
 
-        with open(self.license_path) as f:
-            license_content = f.read().strip()
-        root = ET.fromstring(license_content)
-        client_id = root.find(".//{*}ClientID").text
+        license_content = self._license_content
+        client_id = self._license_root.find(".//{*}ClientID").text
 
-        odm_tree = ET.parse(self.odm_path)
-        odm_root = odm_tree.getroot()
+        odm_root = self._odm_root
         base_url = odm_root.find(".//Protocol[@method='download']").get("baseurl")
         
+        headers = {
+            "License": license_content,
+            "ClientID": client_id
+        }
+
         # Download parts
         parts = odm_root.findall(".//Part")
         with Progress(
@@ -125,7 +194,8 @@ class OverDriveDownloader:
             BarColumn(),
             TaskProgressColumn(),
             console=console
-        ) as progress:
+        ) as progress, ThreadPoolExecutor(max_workers=Config.DOWNLOAD_WORKERS) as executor:
+            futures = []
             for idx, part in enumerate(parts, 1):
                 filename = part.get("filename")
                 filename = quote(filename).replace("{", "%7B").replace("}", "%7D")
@@ -135,28 +205,27 @@ class OverDriveDownloader:
                 if os.path.exists(output_path):
                     continue
 
-                headers = {
-                    "User-Agent": Config.USER_AGENT,
-                    "License": license_content,
-                    "ClientID": client_id
-                }
-
                 task_id = progress.add_task(
                     f"Downloading part {idx}/{len(parts)}",
                     total=100
                 )
 
-                self._download_part(
+                futures.append(executor.submit(
+                    self._download_part,
                     f"{base_url}/{filename}",
                     headers,
                     output_path,
                     progress,
                     task_id
-                )
+                ))
+
+            # Fetch the cover alongside the parts rather than after them
+            futures.append(executor.submit(self._download_cover, output_dir))
+
+            # Re-raise the first download error, if any
+            for future in futures:
+                future.result()
 
-        # Download cover image
-        self._download_cover(output_dir)
-        
         # Create chapters.txt
         self._create_chapters_file(output_dir, parts)
 
@@ -165,18 +234,13 @@ class OverDriveDownloader:
     def _download_cover(self, output_dir: str) -> None:
         """Download cover image if available."""
         try:
-            metadata_tree = ET.parse(self.metadata_path)
-            metadata_root = metadata_tree.getroot()
-            cover_url = metadata_root.find(".//CoverUrl")
+            cover_url = self._metadata_root.find(".//CoverUrl")
             
             if cover_url is not None and cover_url.text:
                 cover_url_text = cover_url.text.replace("{", "%7B").replace("}", "%7D")
                 cover_path = os.path.join(output_dir, "folder.jpg")
                 
-                response = requests.get(
-                    cover_url_text,
-                    headers={"User-Agent": Config.USER_AGENT}
-                )
+                response = self._client.get(cover_url_text)
                 response.raise_for_status()
                 
                 with open(cover_path, 'wb') as f:
@@ -186,24 +250,24 @@ class OverDriveDownloader:
 
     def _create_chapters_file(self, output_dir: str, parts: list) -> None:
         """Create chapters.txt file."""
-        cumulative_time = 0
+        durations = []
+        for part in parts:
+            minutes, seconds = map(int, part.get("duration").split(":"))
+            durations.append(minutes * 60 + seconds)
+
+        # Each part starts where the previous ones end
+        starts = accumulate(durations, initial=0)
+
+        lines = []
+        for start, part in zip(starts, parts):
+            part_name = part.get("name", f"Part {part.get('number')}")
+            lines.append(f"{utils.format_timestamp(start)} {part_name}\n")
+
         with open(os.path.join(output_dir, "chapters.txt"), "w") as f:
-            for part in parts:
-                duration_str = part.get("duration")
-                minutes, seconds = map(int, duration_str.split(":"))
-                duration = minutes * 60 + seconds
-                
-                timestamp = utils.format_timestamp(cumulative_time)
-                part_name = part.get("name", f"Part {part.get('number')}")
-                f.write(f"{timestamp} {part_name}\n")
-                
-                cumulative_time += duration
+            f.write(''.join(lines))
 
     def early_return(self) -> None:
         """Process an early return for an OverDrive book loan."""
-        tree = ET.parse(self.odm_path)
-        root = tree.getroot()
-        
-        return_url = root.find(".//EarlyReturnURL").text
-        response = requests.get(return_url, headers={"User-Agent": Config.USER_AGENT})
+        return_url = self._odm_root.find(".//EarlyReturnURL").text
+        response = self._client.get(return_url)
         response.raise_for_status()
@@ -2,9 +2,14 @@
 
 import os
 import re
+import bisect
+import shutil
 import subprocess
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Optional, Dict, Tuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from itertools import groupby
 from mutagen.mp3 import MP3
 import mutagen.id3 as id3
 from rich.console import Console
@@ -14,12 +19,26 @@ from ..config import Config
 
 console = Console()
 
+# Description of the ID3 TXXX frame OverDrive stores its chapter markers in
+_MEDIA_MARKERS_DESC = 'OverDrive MediaMarkers'
+
+# chapters.txt is rounded to the millisecond, so boundaries are compared within half of that
+_TIMESTAMP_TOLERANCE = 0.0005
+
+_CHAPTER_RE = re.compile(r'(\d{2}):(\d{2}):(\d{2})\.(\d{3})\s+(.*)')
+_BAD_FS_CHARS = re.compile(r'[<>:"/\\|?*]')
+
 @dataclass
 class Chapter:
     """Represents a chapter in the audiobook."""
     title: str
     start: float
     end: Optional[float] = None
+    safe_title: str = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        """Derive the filesystem-safe title once."""
+        self.safe_title = _BAD_FS_CHARS.sub('_', self.title)
 
     def __str__(self) -> str:
         """String representation of the chapter."""
@@ -30,38 +49,50 @@ class AudioProcessor:
         """Initialize the audio processor with the input directory."""
         self.directory = os.path.abspath(directory)
         self.chapters_file = os.path.join(self.directory, 'chapters.txt')
+        self._layout: Optional[List[Tuple[float, float, str]]] = None
         self._validate_directory()
 
     def _validate_directory(self) -> None:
         """Validate that the directory and required files exist."""
-        if not os.path.isdir(self.directory):
+        # One directory scan finds chapters.txt and caches the sorted MP3 entries for later steps
+        mp3_files = []
+        has_chapters = False
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name == 'chapters.txt':
+                        has_chapters = entry.is_file()
+                    elif entry.name.endswith('.mp3') and entry.is_file():
+                        mp3_files.append(entry)
+        except (FileNotFoundError, NotADirectoryError):
             raise ValueError(f"Directory does not exist: {self.directory}")
-        if not os.path.isfile(self.chapters_file):
+        if not has_chapters:
             raise ValueError(f"Chapters file not found: {self.chapters_file}")
-        if not any(f.endswith('.mp3') for f in os.listdir(self.directory)):
+        if not mp3_files:
             raise ValueError(f"No MP3 files found in directory: {self.directory}")
+        mp3_files.sort(key=lambda e: e.name)
+        self._mp3_files = mp3_files
+
+    def _compute_layout(self) -> List[Tuple[float, float, str]]:
+        """Probe each MP3 file once and return its (start, end, filename) on the combined timeline."""
+        if self._layout is None:
+            layout = []
+            current_time = 0
+            for entry in self._mp3_files:
+                duration = utils.get_mp3_duration(entry.path, entry.stat())
+                layout.append((current_time, current_time + duration, entry.name))
+                current_time += duration
+            self._layout = layout
+        return self._layout
 
     def _get_total_duration(self) -> float:
         """Calculate total duration of all MP3 files."""
-        total_duration = 0
-        for file in sorted(os.listdir(self.directory)):
-            if file.endswith('.mp3'):
-                audio = MP3(os.path.join(self.directory, file))
-                total_duration += audio.info.length
-        return total_duration
+        layout = self._compute_layout()
+        return layout[-1][1] if layout else 0.0
 
     def _get_file_boundaries(self) -> List[Tuple[float, float, str]]:
         """Get time boundaries for each MP3 file."""
-        boundaries = []
-        current_time = 0
-        
-        for file in sorted(f for f in os.listdir(self.directory) if f.endswith('.mp3')):
-            audio = MP3(os.path.join(self.directory, file))
-            duration = audio.info.length
-            boundaries.append((current_time, current_time + duration, file))
-            current_time += duration
-            
-        return boundaries
+        return self._compute_layout()
 
     def read_chapters(self) -> List[Chapter]:
         """Read and parse the chapters.txt file."""
@@ -69,21 +100,21 @@ class AudioProcessor:
         
         try:
             with open(self.chapters_file, 'r') as f:
-                lines = f.readlines()
-
-            for i, line in enumerate(lines):
-                match = re.match(r'(\d{2}:\d{2}:\d{2}\.\d{3})\s+(.*)', line.strip())
-                if not match:
-                    continue
+                prev = None
+                for line in f:
+                    match = _CHAPTER_RE.match(line.strip())
+                    if not match:
+                        continue
 
-                timestamp, title = match.groups()
-                start_time = utils.parse_timestamp(timestamp)
-                chapter = Chapter(title, start_time)
-                
-                if i > 0:
-                    chapters[i-1].end = start_time
+                    hours, minutes, seconds, millis, title = match.groups()
+                    start_time = int(hours) * 3600 + int(minutes) * 60 + int(seconds) + int(millis) / 1000.0
+                    chapter = Chapter(title, start_time)
+                    
+                    if prev is not None:
+                        prev.end = start_time
 
-                chapters.append(chapter)
+                    chapters.append(chapter)
+                    prev = chapter
 
             if chapters:
                 chapters[-1].end = self._get_total_duration()
@@ -94,58 +125,95 @@ class AudioProcessor:
             console.print(f"[red]Error reading chapters file: {str(e)}[/red]")
             raise
 
-    def _split_chapter(self, chapter: Chapter, chapter_num: int, 
-                      file_info: Tuple[float, float, str], output_dir: str) -> bool:
-        """Split a single chapter from the source audio file."""
-        start_time, end_time, input_file = file_info
-        chapter_title = re.sub(r'[<>:"/\\|?*]', '_', chapter.title)
-        output_file = os.path.join(output_dir, f"{str(chapter_num).zfill(2)} - {chapter_title}.mp3")
+    def _split_chapters(self, group: List[Tuple[Chapter, int]],
+                        file_info: List[Tuple[float, float, str]], output_dir: str) -> int:
+        """Split consecutive chapters sharing the same source files in one ffmpeg pass."""
+        start_time = file_info[0][0]
+        first_num = group[0][1]
+        last_num = group[-1][1]
 
+        list_path = None
         try:
-            input_path = os.path.join(self.directory, input_file)
-            relative_start = chapter.start - start_time
-            duration = chapter.end - chapter.start
-
-            # Extract chapter using ffmpeg
-            cmd = [
-                'ffmpeg', '-y',
-                '-i', input_path,
-                '-ss', str(relative_start),
-                '-t', str(duration),
-                '-acodec', 'copy',
-                output_file
-            ]
-            subprocess.run(cmd, check=True, capture_output=True)
-
-            # Update metadata
-            self._update_metadata(output_file, chapter, chapter_num)
-            
-            return True
+            if len(file_info) == 1:
+                input_args = ['-i', os.path.join(self.directory, file_info[0][2])]
+                output_args = []
+            else:
+                # Chapters that run past the end of a part are read through the concat demuxer,
+                # which opens each part on its own so their ID3 tags never reach the MPEG stream
+                fd, list_path = tempfile.mkstemp(prefix='concat-', suffix='.txt')
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    for boundary in file_info:
+                        part_path = os.path.join(self.directory, boundary[2]).replace("'", "'\\''")
+                        f.write(f"file '{part_path}'\n")
+                # The demuxer drops the parts' ID3 tags, so take them from the first part directly
+                first_part = os.path.join(self.directory, file_info[0][2])
+                input_args = ['-f', 'concat', '-safe', '0', '-i', list_path, '-i', first_part]
+                output_args = ['-map', '0:a', '-map_metadata', '1']
+
+            # Extract the chapters using ffmpeg, one output per chapter from a single read
+            # of the input; tags are written in the same pass instead of retagging afterwards
+            cmd = ['ffmpeg', '-nostdin', '-hide_banner', '-loglevel', 'error', '-y'] + input_args
+            output_files = []
+            for chapter, chapter_num in group:
+                output_file = os.path.join(output_dir, f"{str(chapter_num).zfill(2)} - {chapter.safe_title}.mp3")
+                cmd += output_args + [
+                    '-ss', str(max(0.0, chapter.start - start_time)),
+                    '-t', str(chapter.end - chapter.start),
+                    '-acodec', 'copy',
+                    '-metadata', f'title={chapter.title}',
+                    '-metadata', f'track={chapter_num}',
+                    '-metadata', f'{_MEDIA_MARKERS_DESC}=',
+                    '-id3v2_version', '3',
+                    '-write_id3v1', '0',
+                    output_file
+                ]
+                output_files.append(output_file)
+            # Only errors are logged, so stderr stays small and stdout is never read
+            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+            written = 0
+            for (chapter, chapter_num), output_file in zip(group, output_files):
+                try:
+                    # Only retag if ffmpeg left the OverDrive markers behind
+                    if f'TXXX:{_MEDIA_MARKERS_DESC}' in id3.ID3(output_file):
+                        self._update_metadata(output_file, chapter, chapter_num)
+                    written += 1
+                except Exception as e:
+                    console.print(f"[red]Unexpected error processing chapter {chapter_num}: {str(e)}[/red]")
+
+            return written
             
         except subprocess.CalledProcessError as e:
-            console.print(f"[red]Error processing chapter {chapter_num}: {str(e)}[/red]")
-            return False
+            console.print(f"[red]Error processing chapters {first_num}-{last_num}: {str(e)}[/red]")
+            if e.stderr:
+                console.print(e.stderr.decode(errors='replace').strip(), markup=False)
+            return 0
         except Exception as e:
-            console.print(f"[red]Unexpected error processing chapter {chapter_num}: {str(e)}[/red]")
-            return False
+            console.print(f"[red]Unexpected error processing chapters {first_num}-{last_num}: {str(e)}[/red]")
+            return 0
+        finally:
+            if list_path is not None:
+                os.remove(list_path)
 
     def _update_metadata(self, file_path: str, chapter: Chapter, chapter_num: int) -> None:
         """Update MP3 metadata tags."""
         try:
-            audio = MP3(file_path)
-            
-            if not audio.tags:
-                audio.tags = id3.ID3()
+            # mutagen rewrites tags with many small reads and writes; a large buffer batches them
+            with open(file_path, 'r+b', buffering=1 << 20) as f:
+                audio = MP3(f)
+                
+                if not audio.tags:
+                    audio.tags = id3.ID3()
 
-            # Remove OverDrive MediaMarkers if present
-            if 'TXXX:OverDrive MediaMarkers' in audio.tags:
-                del audio.tags['TXXX:OverDrive MediaMarkers']
+                # Remove OverDrive MediaMarkers if present
+                if f'TXXX:{_MEDIA_MARKERS_DESC}' in audio.tags:
+                    del audio.tags[f'TXXX:{_MEDIA_MARKERS_DESC}']
 
-            # Update title and track number
-            audio.tags.add(id3.TIT2(encoding=3, text=chapter.title))
-            audio.tags.add(id3.TRCK(encoding=3, text=str(chapter_num)))
+                # Update title and track number
+                audio.tags.add(id3.TIT2(encoding=3, text=chapter.title))
+                audio.tags.add(id3.TRCK(encoding=3, text=str(chapter_num)))
 
-            audio.save(v2_version=3)
+                audio.save(f, v2_version=3)
             
         except Exception as e:
             console.print(f"[red]Error updating metadata for chapter {chapter_num}: {str(e)}[/red]")
@@ -179,13 +247,44 @@ class AudioProcessor:
                     total=len(chapters)
                 )
 
+                # Boundaries are contiguous and sorted, so bisect finds the files a chapter spans;
+                # a chapter that opens a part is usually rounded to just before its boundary
+                starts = [boundary[0] for boundary in file_boundaries]
+                jobs = []
                 for i, chapter in enumerate(chapters, 1):
-                    # Find which input file contains this chapter
-                    for boundary in file_boundaries:
-                        if chapter.start >= boundary[0] and chapter.start < boundary[1]:
-                            if self._split_chapter(chapter, i, boundary, output_dir):
-                                progress.update(task, advance=1)
-                                break
+                    first = bisect.bisect_right(starts, chapter.start + _TIMESTAMP_TOLERANCE) - 1
+                    if first < 0 or chapter.start >= file_boundaries[first][1]:
+                        console.print(f"[yellow]Chapter {i} starts outside the audio files, skipping[/yellow]")
+                        continue
+                    last = max(first, bisect.bisect_left(starts, chapter.end - _TIMESTAMP_TOLERANCE) - 1)
+                    jobs.append((first, last, chapter, i))
+
+                # Consecutive chapters read from the same files are cut in a single ffmpeg pass
+                groups = [
+                    ([(chapter, i) for _, _, chapter, i in group], file_boundaries[first:last + 1])
+                    for (first, last), group in groupby(jobs, key=lambda job: job[:2])
+                ]
+
+                # Each split is an independent ffmpeg run, so threads only wait on subprocesses;
+                # a group's fallback retag also overlaps with the ffmpeg runs of the other groups
+                with ThreadPoolExecutor(max_workers=Config.SPLIT_WORKERS) as executor:
+                    futures = [
+                        executor.submit(self._split_chapters, group, file_info, output_dir)
+                        for group, file_info in groups
+                    ]
+                    # Futures are per source-file group, so this is already one update per group
+                    total_written = 0
+                    for future in as_completed(futures):
+                        written = future.result()
+                        total_written += written
+                        if written:
+                            progress.update(task, advance=written)
+
+            # A failed ffmpeg run loses every chapter of its group, so don't report
+            # success (and let the caller clean up the sources) unless all were written
+            if total_written < len(chapters):
+                console.print(f"[red]Only {total_written} of {len(chapters)} chapters were written[/red]")
+                return False
 
             return True
             
@@ -196,14 +295,7 @@ class AudioProcessor:
     def cleanup_original_files(self) -> bool:
         """Remove all original files and folders after successful processing."""
         try:
-            for root, dirs, files in os.walk(self.directory, topdown=False):
-                for name in files:
-                    file_path = os.path.join(root, name)
-                    os.remove(file_path)
-                for name in dirs:
-                    dir_path = os.path.join(root, name)
-                    os.rmdir(dir_path)
-            os.rmdir(self.directory)
+            shutil.rmtree(self.directory)
             return True
             
         except Exception as e:
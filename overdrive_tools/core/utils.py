@@ -1,20 +1,27 @@
 # overdrive_tools/core/utils.py
 
+import io
 import re
 import os
 import uuid
 import base64
+import codecs
 import hashlib
-import xml.etree.ElementTree as ET
-from typing import Dict, Tuple
+import defusedxml.ElementTree as ET
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
 from urllib.parse import quote
+from mutagen.mp3 import MPEGInfo
 from rich.console import Console
 
 console = Console()
 
+_SANITIZE_RE = re.compile(r'[^\w\s._-]')
+_UTF16LE = codecs.getencoder('utf-16-le')
+
 def sanitize(text: str) -> str:
     """Replace filename-unfriendly characters with a hyphen and trim leading/trailing hyphens/spaces."""
-    sanitized = re.sub(r'[^\w\s._-]', '-', text)
+    sanitized = _SANITIZE_RE.sub('-', text)
     return sanitized.strip('- ')
 
 def parse_timestamp(timestamp: str) -> float:
@@ -25,14 +32,14 @@ def parse_timestamp(timestamp: str) -> float:
     total_seconds += float(f"0.{milliseconds}")
     return total_seconds
 
+@lru_cache(maxsize=2048)
 def format_timestamp(seconds: float) -> str:
     """Convert seconds to HH:MM:SS.mmm format"""
-    hours = int(seconds // 3600)
-    seconds = seconds % 3600
-    minutes = int(seconds // 60)
-    seconds = seconds % 60
-    whole_seconds = int(seconds)
-    milliseconds = int((seconds - whole_seconds) * 1000)
+    # Work in whole milliseconds so the fields are exact and rounding carries over
+    total_ms = int(round(seconds * 1000))
+    hours, rem = divmod(total_ms, 3_600_000)
+    minutes, rem = divmod(rem, 60_000)
+    whole_seconds, milliseconds = divmod(rem, 1000)
     return f"{hours:02d}:{minutes:02d}:{whole_seconds:02d}.{milliseconds:03d}"
 
 def generate_client_id() -> Tuple[str, str]:
@@ -41,32 +48,41 @@ def generate_client_id() -> Tuple[str, str]:
     
     client_id = str(uuid.uuid4()).upper()
     raw_hash = f"{client_id}|{Config.OMC}|{Config.OS}|ELOSNOC*AIDEM*EVIRDREVO"
-    raw_hash_bytes = raw_hash.encode('utf-16le')
-    hash_value = base64.b64encode(hashlib.sha1(raw_hash_bytes).digest()).decode('ascii')
+    raw_hash_bytes = _UTF16LE(raw_hash)[0]
+    # The hash is a client token, not a security check; OverDrive requires SHA-1
+    try:
+        digest = hashlib.sha1(raw_hash_bytes, usedforsecurity=False).digest()
+    except TypeError:  # usedforsecurity needs Python 3.9+
+        digest = hashlib.sha1(raw_hash_bytes).digest()
+    hash_value = base64.b64encode(digest).decode('ascii')
     
     return client_id, hash_value
 
 def get_metadata_info(metadata_path: str) -> Dict[str, str]:
     """Extract author and title from metadata file."""
     try:
-        with open(metadata_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            
-        if not content.strip().startswith('<'):
-            content = '<Metadata>' + content + '</Metadata>'
-            
-        root = ET.fromstring(content)
-        
-        author = "Unknown Author"
-        for creator in root.findall(".//Creator"):
-            if creator.get("role", "").startswith("Author"):
-                author = creator.text if creator.text else "Unknown Author"
-                break
-                
-        title = "Unknown Title"
-        title_elem = root.find(".//Title")
-        if title_elem is not None and title_elem.text:
-            title = title_elem.text
+        author = None
+        title = None
+        with open(metadata_path, 'rb') as f:
+            if f.read(1024).lstrip().startswith(b'<'):
+                f.seek(0)
+                source = f
+            else:
+                # Bare fragments need a root element before they can be parsed
+                f.seek(0)
+                source = io.BytesIO(b'<Metadata>' + f.read().strip() + b'</Metadata>')
+
+            # Stream the document and stop as soon as both fields have been seen
+            for _, elem in ET.iterparse(source):
+                if author is None and elem.tag == "Creator" and elem.get("role", "").startswith("Author"):
+                    author = elem.text if elem.text else "Unknown Author"
+                elif title is None and elem.tag == "Title":
+                    title = elem.text if elem.text else "Unknown Title"
+                if author is not None and title is not None:
+                    break
+
+        author = author or "Unknown Author"
+        title = title or "Unknown Title"
             
         if title != "Unknown Title":
             title = sanitize(title)
@@ -81,6 +97,18 @@ def ensure_dir_exists(path: str) -> None:
     """Create directory if it doesn't exist."""
     os.makedirs(path, exist_ok=True)
 
+def get_mp3_duration(file_path: str, stat: Optional[os.stat_result] = None) -> float:
+    """Get MP3 duration in seconds, cached until the file changes."""
+    if stat is None:
+        stat = os.stat(file_path)
+    return _read_mp3_duration(file_path, stat.st_mtime_ns, stat.st_size)
+
+@lru_cache(maxsize=256)
+def _read_mp3_duration(file_path: str, mtime_ns: int, size: int) -> float:
+    """Read MP3 duration from the stream headers only, skipping ID3 tag parsing."""
+    with open(file_path, 'rb') as f:
+        return MPEGInfo(f).length
+
 def get_file_size(file_path: str) -> int:
     """Get file size in bytes."""
     try:
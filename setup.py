@@ -33,12 +33,14 @@ setup(
     ],
     python_requires=">=3.8",
     install_requires=[
-        "requests>=2.25.0",
+        "httpx[http2]>=0.24.0",
         "rich>=10.0.0",
         "mutagen>=1.45.0",
+        "defusedxml>=0.7.0",
     ],
     extras_require={
         'beets': ['beets>=1.6.0'],
+        'lxml': ['lxml>=4.6.0'],
     },
     entry_points={
         "console_scripts": [